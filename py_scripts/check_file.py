@@ -1,21 +1,47 @@
 #!/usr/bin/env python3
 """Quick check of WRC data file format and orientation data"""
 
+import mmap
 import struct
 import sys
 from pathlib import Path
-import math
+
+import numpy as np
+
+# V3 IMU sample layout: d (timestamp) + ffffff (ax..gz) + fff (mx,my,mz) = 44 bytes
+IMU_DTYPE_V3 = np.dtype([
+    ('t', '<f8'),
+    ('ax', '<f4'), ('ay', '<f4'), ('az', '<f4'),
+    ('gx', '<f4'), ('gy', '<f4'), ('gz', '<f4'),
+    ('mx', '<f4'), ('my', '<f4'), ('mz', '<f4')
+])
+
+HEADER_SIZE = 128
+CALIBRATION_SIZE = 64
+
+# Precompiled header structs - avoids re-parsing the format string per call
+_HDR_COUNTS = struct.Struct('<II')
+_HDR_CAL_COUNT = struct.Struct('<I')
+_HDR_FLAG = struct.Struct('<B')
+_HDR_SESSION = struct.Struct('<d')
+_HDR_MODE = struct.Struct('<BB')
+_HDR_THRESH = struct.Struct('<ff')
+
 
 def check_file(filepath: str):
     """Check file format and orientation data"""
-    with open(filepath, 'rb') as f:
-        data = f.read()
-    
+    # Memory-map instead of f.read(): only the pages actually inspected
+    # (header + first IMU samples) are faulted in, not the whole file
+    with open(filepath, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        _check_mapped(filepath, data)
+
+
+def _check_mapped(filepath: str, data):
     # Check magic string
-    magic = data[0:16].rstrip(b'\x00').decode('ascii')
+    magic = bytes(data[0:16]).rstrip(b'\x00').decode('ascii')
     print(f"File: {Path(filepath).name}")
     print(f"Magic: {magic}")
-    
+
     if magic.startswith('WRC_COACH_V3'):
         version = 3
         print(f"✓ Format: V{version} (includes orientation/magnetometer)")
@@ -28,64 +54,70 @@ def check_file(filepath: str):
     else:
         print(f"✗ Unknown format: {magic}")
         return
-    
+
     # Read header
     offset = 16
-    imu_count, gps_count = struct.unpack_from('<II', data, offset)
-    offset += 8
-    
+    imu_count, gps_count = _HDR_COUNTS.unpack_from(data, offset)
+    offset += _HDR_COUNTS.size
+
     if version >= 2:
-        calibration_count, = struct.unpack_from('<I', data, offset)
-        offset += 4
-        has_calibration = struct.unpack_from('<B', data, offset)[0] == 1
-        offset += 1
-    
-    session_start, = struct.unpack_from('<d', data, offset)
-    offset += 8
-    
-    phone_orient_byte, demo_mode_byte = struct.unpack_from('<BB', data, offset)
+        calibration_count, = _HDR_CAL_COUNT.unpack_from(data, offset)
+        offset += _HDR_CAL_COUNT.size
+        has_calibration = _HDR_FLAG.unpack_from(data, offset)[0] == 1
+        offset += _HDR_FLAG.size
+
+    session_start, = _HDR_SESSION.unpack_from(data, offset)
+    offset += _HDR_SESSION.size
+
+    phone_orient_byte, demo_mode_byte = _HDR_MODE.unpack_from(data, offset)
     phone_orientation = 'coxswain' if phone_orient_byte == 1 else 'rower'
     demo_mode = demo_mode_byte == 1
-    offset += 2
-    
-    catch_thresh, finish_thresh = struct.unpack_from('<ff', data, offset)
-    
+    offset += _HDR_MODE.size
+
+    catch_thresh, finish_thresh = _HDR_THRESH.unpack_from(data, offset)
+
     print(f"\nHeader info:")
     print(f"  IMU samples: {imu_count:,}")
     print(f"  GPS samples: {gps_count:,}")
     print(f"  Phone orientation: {phone_orientation}")
     print(f"  Demo mode: {demo_mode}")
-    
+
     # Check for orientation data in V3 files
     if version == 3:
-        # Skip calibration if present
-        if version >= 2 and has_calibration:
-            offset += 64  # CALIBRATION_SIZE
-        
-        # Check first few IMU samples for orientation data
-        IMU_SAMPLE_SIZE_V3 = 44
-        samples_with_orientation = 0
-        samples_checked = min(100, imu_count)  # Check first 100 samples
-        
-        print(f"\nChecking first {samples_checked} IMU samples for orientation data...")
-        
-        for i in range(samples_checked):
-            # V3 format: d (timestamp) + fffffff (ax,ay,az,gx,gy,gz) + fff (mx,my,mz)
-            t, ax, ay, az, gx, gy, gz, mx, my, mz = struct.unpack_from('<dfffffffff', data, offset)
-            
-            # Check if orientation data is present (not NaN)
-            if not (math.isnan(mx) and math.isnan(my) and math.isnan(mz)):
-                samples_with_orientation += 1
-                if samples_with_orientation == 1:
-                    print(f"  First sample with orientation: alpha={mx:.1f}°, beta={my:.1f}°, gamma={mz:.1f}°")
-            
-            offset += IMU_SAMPLE_SIZE_V3
-        
+        # IMU samples start after the fixed-size header (plus calibration block if present)
+        offset = HEADER_SIZE
+        if has_calibration:
+            offset += CALIBRATION_SIZE
+
+        # Scan every IMU sample for orientation data. The vectorized
+        # NaN reduction over the mapped block runs at memory bandwidth,
+        # so a full-file scan is cheap even for multi-hour sessions.
+        # The count is clamped to the bytes actually present so
+        # truncated files don't over-read.
+        samples_available = max(0, (len(data) - offset)) // IMU_DTYPE_V3.itemsize
+        samples_checked = min(imu_count, samples_available)
+
+        if samples_checked == 0:
+            print("\n✗ No IMU samples available to check")
+            return
+
+        print(f"\nChecking {samples_checked:,} IMU samples for orientation data...")
+
+        # Single structured-dtype view over the IMU block - no per-sample unpacking
+        samples = np.frombuffer(data, dtype=IMU_DTYPE_V3, count=samples_checked, offset=offset)
+
+        # Orientation is present when mx/my/mz are not all NaN (vectorized scan)
+        has_orientation = ~(np.isnan(samples['mx']) & np.isnan(samples['my']) & np.isnan(samples['mz']))
+        samples_with_orientation = int(has_orientation.sum())
+
+        if samples_with_orientation > 0:
+            first = samples[np.argmax(has_orientation)]
+            print(f"  First sample with orientation: alpha={first['mx']:.1f}°, beta={first['my']:.1f}°, gamma={first['mz']:.1f}°")
+
         if samples_with_orientation > 0:
-            print(f"\n✓ Orientation data found: {samples_with_orientation}/{samples_checked} samples checked")
-            print(f"  Estimated: {samples_with_orientation * imu_count // samples_checked:,}/{imu_count:,} total samples")
+            print(f"\n✓ Orientation data found: {samples_with_orientation:,}/{samples_checked:,} samples checked")
         else:
-            print(f"\n✗ No orientation data found in first {samples_checked} samples")
+            print(f"\n✗ No orientation data found in {samples_checked:,} samples")
             print(f"  All mx/my/mz values are NaN")
     else:
         print(f"\n✗ V{version} format does not include orientation data")
@@ -94,6 +126,5 @@ if __name__ == '__main__':
     if len(sys.argv) < 2:
         print("Usage: python check_file.py <file.wrcdata>")
         sys.exit(1)
-    
-    check_file(sys.argv[1])
 
+    check_file(sys.argv[1])
@@ -4,26 +4,78 @@ Create interactive GPS map from .wrcdata file
 Uses folium for interactive maps with speed coloring
 """
 
+import math
 import sys
+import matplotlib
 import numpy as np
 from read_wrcdata import WRCDataReader
 
+_EARTH_RADIUS = 6371000  # meters
+
+# Split-time colormap, looked up once at import (reversed so green =
+# fast / low split, red = slow / high split)
+_SPLIT_CMAP = matplotlib.colormaps['RdYlGn_r']
+
+
+def _haversine_scalar(lat1, lon1, lat2, lon2):
+    """Haversine distance between two points (math-only fast path for scalars)"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi/2)**2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda/2)**2
+    return 2 * _EARTH_RADIUS * math.atan2(math.sqrt(a), math.sqrt(1-a))
+
+
+def _haversine_vec(lats1, lons1, lats2, lons2):
+    """Haversine distance between two arrays of points (vectorized)"""
+    phi1, phi2 = np.radians(lats1), np.radians(lats2)
+    dphi = phi2 - phi1
+    dlambda = np.radians(lons2 - lons1)
+    a = np.sin(dphi/2)**2 + np.cos(phi1) * np.cos(phi2) * np.sin(dlambda/2)**2
+    return 2 * _EARTH_RADIUS * np.arctan2(np.sqrt(a), np.sqrt(1-a))
+
+
+def _cumulative_distance(lats, lons):
+    """Accumulated haversine distance (meters) at each GPS point.
+
+    One traversal yields both the total route distance (last element)
+    and O(1) distance-to-point lookups for per-500m split analysis.
+    """
+    seg = _haversine_vec(lats[:-1], lons[:-1], lats[1:], lons[1:])
+    cumulative = np.empty(len(lats))
+    cumulative[0] = 0
+    np.cumsum(seg, out=cumulative[1:])
+    return cumulative
+
+
+def _load(filepath):
+    """Parse the .wrcdata file once - shared by both map backends"""
+    return WRCDataReader(filepath).read_as_numpy()
+
+
 def create_interactive_map(filepath, output_html='gps_map.html'):
     """Create interactive HTML map with GPS track"""
-    
+
+    # Peek at the header before parsing the full file - no point
+    # allocating the IMU arrays for a session without GPS fixes
+    if WRCDataReader(filepath).read_header().gps_count == 0:
+        print("❌ No GPS data available in file")
+        return
+
+    # Read data first so the fallback path can reuse it without re-parsing
+    data = _load(filepath)
+
     try:
         import folium
         from folium import plugins
     except ImportError:
         print("❌ Folium not installed. Install with: pip install folium")
         print("\n🔄 Falling back to matplotlib static map...")
-        create_matplotlib_map(filepath)
+        create_matplotlib_map(filepath, data=data)
         return
-    
-    # Read data
-    reader = WRCDataReader(filepath)
-    header, imu, gps, cal = reader.read_as_numpy()
-    
+
+    header, imu, gps, cal = data
+
     if len(gps) == 0 or np.all(gps['lat'] == 0):
         print("❌ No GPS data available in file")
         return
@@ -57,58 +109,37 @@ def create_interactive_map(filepath, output_html='gps_map.html'):
     folium.TileLayer('CartoDB dark_matter', name='Dark').add_to(m)
     
     # Calculate split times (min/500m) - rowing standard
-    # Split = time to row 500m at this speed
-    splits = []
-    for speed in speeds:
-        if speed > 0.1:  # Avoid division by zero
-            split_seconds = 500 / speed
-            splits.append(split_seconds)
-        else:
-            splits.append(999)  # Very slow/stopped
-    
-    splits = np.array(splits)
-    
-    # Create split time colormap (reversed - lower is better)
-    from matplotlib import cm
-    from matplotlib.colors import Normalize
-    
-    # Filter out extreme values for better visualization
+    # Split = time to row 500m at this speed; 999 = very slow/stopped
+    splits = np.where(speeds > 0.1, 500.0 / np.maximum(speeds, 1e-6), 999.0)
+
+    # Filter out extreme values for better visualization; cache the
+    # min/max once - the colorbar legend reuses the same bounds below
     valid_splits = splits[splits < 300]  # Ignore splits > 5 min
     if len(valid_splits) > 0:
-        norm = Normalize(vmin=valid_splits.min(), vmax=valid_splits.max())
+        min_split, max_split = valid_splits.min(), valid_splits.max()
     else:
-        norm = Normalize(vmin=splits.min(), vmax=splits.max())
-    
-    # Reverse colormap so green = fast (low split), red = slow (high split)
-    colormap = cm.get_cmap('RdYlGn_r')
-    
-    # Add route segments colored by split time
-    for i in range(len(lats) - 1):
-        split_color = colormap(norm(splits[i]))
-        color_hex = '#%02x%02x%02x' % (
-            int(split_color[0] * 255),
-            int(split_color[1] * 255),
-            int(split_color[2] * 255)
-        )
-        
-        # Time for this segment
-        t_rel = (timestamps[i] - timestamps[0]) / 1000
-        minutes = int(t_rel // 60)
-        seconds = int(t_rel % 60)
-        
-        # Format split time
-        split_min = int(splits[i] // 60)
-        split_sec = int(splits[i] % 60)
-        
-        folium.PolyLine(
-            locations=[[lats[i], lons[i]], [lats[i+1], lons[i+1]]],
-            color=color_hex,
-            weight=5,
-            opacity=0.8,
-            popup=f"<b>Split: {split_min}:{split_sec:02d} /500m</b><br>"
-                  f"Speed: {speeds[i]:.2f} m/s ({speeds[i]*3.6:.1f} km/h)<br>"
-                  f"Time: {minutes}:{seconds:02d}"
-        ).add_to(m)
+        min_split, max_split = splits.min(), splits.max()
+
+    colormap = _SPLIT_CMAP
+
+    # Draw the whole route as a single ColorLine layer: folium buckets
+    # the per-segment split values client-side, so the HTML carries one
+    # JSON blob instead of one PolyLine object per GPS segment.
+    # Cast RGB channels to uint8 in one shot; formatting then runs on
+    # integer scalars with no per-channel float->int rounding calls
+    n_steps = 16
+    step_rgb8 = (colormap(np.linspace(0, 1, n_steps))[:, :3] * 255).astype(np.uint8)
+    step_hex = [f'#{r:02x}{g:02x}{b:02x}' for r, g, b in step_rgb8]
+
+    from folium.features import ColorLine
+    ColorLine(
+        positions=np.column_stack([lats, lons]).tolist(),
+        colors=np.clip(splits[:-1], min_split, max_split),
+        colormap=step_hex,
+        nb_steps=n_steps,
+        weight=5,
+        opacity=0.8
+    ).add_to(m)
     
     # Add start marker
     folium.Marker(
@@ -124,20 +155,10 @@ def create_interactive_map(filepath, output_html='gps_map.html'):
         icon=folium.Icon(color='red', icon='stop')
     ).add_to(m)
     
-    # Calculate total distance
-    def haversine_distance(lat1, lon1, lat2, lon2):
-        R = 6371000  # Earth radius in meters
-        phi1, phi2 = np.radians(lat1), np.radians(lat2)
-        dphi = np.radians(lat2 - lat1)
-        dlambda = np.radians(lon2 - lon1)
-        a = np.sin(dphi/2)**2 + np.cos(phi1) * np.cos(phi2) * np.sin(dlambda/2)**2
-        return 2 * R * np.arctan2(np.sqrt(a), np.sqrt(1-a))
-    
-    total_distance = sum([
-        haversine_distance(lats[i], lons[i], lats[i+1], lons[i+1])
-        for i in range(len(lats)-1)
-    ])
-    
+    # Calculate total distance from the accumulated per-point distances
+    cumulative_distance = _cumulative_distance(lats, lons)
+    total_distance = float(cumulative_distance[-1])
+
     # Add statistics overlay
     duration = (timestamps[-1] - timestamps[0]) / 1000
     avg_speed = np.mean(speeds)
@@ -173,16 +194,8 @@ def create_interactive_map(filepath, output_html='gps_map.html'):
     """
     m.get_root().html.add_child(folium.Element(stats_html))
     
-    # Add colorbar legend with split times
-    # Calculate min/max splits for display
-    valid_splits_for_legend = splits[splits < 300]
-    if len(valid_splits_for_legend) > 0:
-        min_split = valid_splits_for_legend.min()
-        max_split = valid_splits_for_legend.max()
-    else:
-        min_split = splits.min()
-        max_split = splits.max()
-    
+    # Add colorbar legend with split times (reuses the colormap bounds
+    # cached above - no second pass over splits)
     min_split_min = int(min_split // 60)
     min_split_sec = int(min_split % 60)
     max_split_min = int(max_split // 60)
@@ -229,15 +242,15 @@ def create_interactive_map(filepath, output_html='gps_map.html'):
     print(f"   GPS Points: {len(gps)}")
 
 
-def create_matplotlib_map(filepath):
+def create_matplotlib_map(filepath, data=None):
     """Fallback: Create static map with matplotlib"""
     import matplotlib.pyplot as plt
-    from matplotlib.cm import get_cmap
     from matplotlib.colors import Normalize
-    
-    reader = WRCDataReader(filepath)
-    header, imu, gps, cal = reader.read_as_numpy()
-    
+
+    if data is None:
+        data = _load(filepath)
+    header, imu, gps, cal = data
+
     if len(gps) == 0 or np.all(gps['lat'] == 0):
         print("❌ No GPS data available")
         return
@@ -259,7 +272,7 @@ def create_matplotlib_map(filepath):
     fig, ax = plt.subplots(figsize=(12, 10))
     
     # Plot route colored by split time (reversed colormap)
-    cmap = get_cmap('RdYlGn_r')
+    cmap = _SPLIT_CMAP
     valid_splits = splits[splits < 300]
     if len(valid_splits) > 0:
         norm = Normalize(vmin=valid_splits.min(), vmax=valid_splits.max())
@@ -285,19 +298,8 @@ def create_matplotlib_map(filepath):
     tick_labels = [f"{int(t//60)}:{int(t%60):02d}" for t in ticks]
     cbar.set_ticklabels(tick_labels)
     
-    # Calculate distance
-    def haversine_distance(lat1, lon1, lat2, lon2):
-        R = 6371000
-        phi1, phi2 = np.radians(lat1), np.radians(lat2)
-        dphi = np.radians(lat2 - lat1)
-        dlambda = np.radians(lon2 - lon1)
-        a = np.sin(dphi/2)**2 + np.cos(phi1) * np.cos(phi2) * np.sin(dlambda/2)**2
-        return 2 * R * np.arctan2(np.sqrt(a), np.sqrt(1-a))
-    
-    total_distance = sum([
-        haversine_distance(lats[i], lons[i], lats[i+1], lons[i+1])
-        for i in range(len(lats)-1)
-    ])
+    # Calculate distance from the accumulated per-point distances
+    total_distance = float(_cumulative_distance(lats, lons)[-1])
     
     # Calculate average split
     avg_split = np.mean(valid_splits) if len(valid_splits) > 0 else 0
@@ -5,6 +5,7 @@ Reads .wrcdata files (V1 and V2) for post-processing and algorithm development
 Supports pandas DataFrames for easy analysis
 """
 
+import math
 import struct
 import numpy as np
 import pandas as pd
@@ -66,6 +67,53 @@ class GPSSample:
     accuracy: float  # meters
 
 
+def _imu_sample_from_values(values) -> IMUSample:
+    """Build an IMUSample from a flat value tuple (7 or 10 fields)"""
+    if len(values) == 10:  # V3 with magnetometer fields
+        t, ax, ay, az, gx, gy, gz, mx, my, mz = values
+        return IMUSample(t, ax, ay, az, gx, gy, gz,
+                         mx if not math.isnan(mx) else None,
+                         my if not math.isnan(my) else None,
+                         mz if not math.isnan(mz) else None)
+    return IMUSample(*values)
+
+
+def _imu_sample_from_row(row) -> IMUSample:
+    """Materialize an IMUSample from one structured-array record"""
+    return _imu_sample_from_values(row.tolist())
+
+
+def _gps_sample_from_row(row) -> GPSSample:
+    """Materialize a GPSSample from one structured-array record"""
+    return GPSSample(*row.tolist())
+
+
+class _SampleView:
+    """Sequence view over a structured sample array.
+
+    Dataclass instances are built lazily on indexing/iteration, so bulk
+    data stays in the compact numpy buffer (a few MB) instead of
+    ~200 bytes of Python-object overhead per sample.
+    """
+
+    def __init__(self, array: np.ndarray, factory):
+        self._array = array
+        self._factory = factory
+
+    def __len__(self) -> int:
+        return len(self._array)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._factory(row) for row in self._array[index]]
+        return self._factory(self._array[index])
+
+    def __iter__(self):
+        factory = self._factory
+        for row in self._array:
+            yield factory(row)
+
+
 class WRCDataReader:
     """Reader for .wrcdata binary files (V1, V2, and V3)"""
     
@@ -80,197 +128,232 @@ class WRCDataReader:
     IMU_SAMPLE_SIZE_V3 = 44
     GPS_SAMPLE_SIZE = 36
     CALIBRATION_SIZE = 64
-    
+
+    # On-disk sample layouts as little-endian structured dtypes.
+    # np.frombuffer with these aliases the file bytes directly - no
+    # per-sample unpacking and no intermediate Python objects.
+    IMU_DTYPE = np.dtype([
+        ('t', '<f8'), ('ax', '<f4'), ('ay', '<f4'), ('az', '<f4'),
+        ('gx', '<f4'), ('gy', '<f4'), ('gz', '<f4')
+    ])
+    IMU_DTYPE_V3 = np.dtype(IMU_DTYPE.descr + [('mx', '<f4'), ('my', '<f4'), ('mz', '<f4')])
+    GPS_DTYPE = np.dtype([
+        ('t', '<f8'), ('lat', '<f8'), ('lon', '<f8'),
+        ('speed', '<f4'), ('heading', '<f4'), ('accuracy', '<f4')
+    ])
+
+    assert IMU_DTYPE.itemsize == IMU_SAMPLE_SIZE_V1
+    assert IMU_DTYPE_V3.itemsize == IMU_SAMPLE_SIZE_V3
+    assert GPS_DTYPE.itemsize == GPS_SAMPLE_SIZE
+
+    # Precompiled Structs - a bound .unpack_from skips the per-call
+    # format-string lookup that module-level struct.unpack_from pays
+    _HDR_COUNTS = struct.Struct('<II')
+    _HDR_CAL_COUNT = struct.Struct('<I')
+    _HDR_FLAG = struct.Struct('<B')
+    _HDR_SESSION = struct.Struct('<d')
+    _HDR_MODE = struct.Struct('<BB')
+    _HDR_THRESH = struct.Struct('<ff')
+    # Calibration block payload; the remaining bytes up to
+    # CALIBRATION_SIZE are reserved padding
+    _CAL_STRUCT = struct.Struct('<fffffIfd')
+
+    assert _CAL_STRUCT.size <= CALIBRATION_SIZE
+
     def __init__(self, filepath: str):
         self.filepath = Path(filepath)
-        
-    def read(self) -> Tuple[Header, List[IMUSample], List[GPSSample], List[IMUSample]]:
-        """Read entire file - returns (header, imu_samples, gps_samples, calibration_samples)"""
-        with open(self.filepath, 'rb') as f:
-            data = f.read()
-        
-        offset = 0
-        
-        # Detect version from magic string
-        magic = data[0:16].rstrip(b'\x00').decode('ascii')
-        if magic.startswith('WRC_COACH_V3'):
-            version = 3
-        elif magic.startswith('WRC_COACH_V2'):
-            version = 2
-        elif magic.startswith('WRC_COACH_V1'):
-            version = 1
-        else:
-            raise ValueError(f'Invalid file format: {magic}')
-        
-        # Read header
-        header = self._read_header(data, offset, version)
-        header_size = self.HEADER_SIZE_V3 if version >= 2 else self.HEADER_SIZE_V1
-        offset += header_size
-        
-        # Read calibration data if V2 or V3 and present
-        if version >= 2 and header.has_calibration:
-            calibration = self._read_calibration(data, offset)
-            header.calibration = calibration
-            offset += self.CALIBRATION_SIZE
-        
-        # Determine IMU sample size based on version
-        if version == 3:
-            imu_sample_size = self.IMU_SAMPLE_SIZE_V3
-        elif version == 2:
-            imu_sample_size = self.IMU_SAMPLE_SIZE_V2
-        else:  # version == 1
-            imu_sample_size = self.IMU_SAMPLE_SIZE_V1
-        
-        # Read IMU samples
-        imu_samples = []
-        for _ in range(header.imu_count):
-            sample = self._read_imu_sample(data, offset, version)
-            imu_samples.append(sample)
-            offset += imu_sample_size
-        
-        # Read GPS samples
-        gps_samples = []
-        for _ in range(header.gps_count):
-            sample = self._read_gps_sample(data, offset)
-            gps_samples.append(sample)
-            offset += self.GPS_SAMPLE_SIZE
-        
-        # Read calibration samples (V2/V3 only)
-        calibration_samples = []
-        if version >= 2:
-            for _ in range(header.calibration_count):
-                sample = self._read_imu_sample(data, offset, version)
-                calibration_samples.append(sample)
-                offset += imu_sample_size
-        
+        self._mmap: Optional[np.memmap] = None
+        self._parsed: Optional[Tuple[Header, np.ndarray, np.ndarray, np.ndarray]] = None
+
+    def _map_file(self) -> np.memmap:
+        """Memory-map the file instead of slurping it into a bytes object.
+
+        The OS pages in only what the parsers touch, and structured-dtype
+        views alias the mapped pages directly. The mapping is kept on the
+        reader so returned views stay valid for its lifetime.
+        """
+        if self._mmap is None:
+            self._mmap = np.memmap(self.filepath, dtype=np.uint8, mode='r')
+        return self._mmap
+
+    @classmethod
+    def _detect_version(cls, data) -> int:
+        """Detect format version from the 16-byte magic string.
+
+        Compares raw bytes instead of decoding to str first - no
+        allocation, and no decode errors on corrupted magic bytes.
+        """
+        magic = bytes(data[0:len(cls.MAGIC_V1)])
+        if magic == cls.MAGIC_V3:
+            return 3
+        elif magic == cls.MAGIC_V2:
+            return 2
+        elif magic == cls.MAGIC_V1:
+            return 1
+        raise ValueError(f'Invalid file format: {bytes(data[0:16])!r}')
+
+    def read(self) -> Tuple[Header, _SampleView, _SampleView, _SampleView]:
+        """Read entire file - returns (header, imu_samples, gps_samples, calibration_samples).
+
+        The sample collections are lazy views over numpy structured
+        arrays: indexing or iterating yields IMUSample/GPSSample
+        instances on demand, while the bulk data stays in compact
+        binary buffers. Use read_as_lists() for eager dataclass lists.
+        """
+        header, imu_array, gps_array, cal_array = self.read_as_numpy()
+        return (header,
+                _SampleView(imu_array, _imu_sample_from_row),
+                _SampleView(gps_array, _gps_sample_from_row),
+                _SampleView(cal_array, _imu_sample_from_row))
+
+    def read_as_lists(self) -> Tuple[Header, List[IMUSample], List[GPSSample], List[IMUSample]]:
+        """Read entire file into eager dataclass lists (legacy path).
+
+        Built on top of read_as_numpy() so the structured-dtype parse is
+        the single source of truth; .tolist() converts each section to
+        plain tuples in one C call before boxing into dataclasses.
+        """
+        header, imu_array, gps_array, cal_array = self.read_as_numpy()
+
+        imu_samples = [_imu_sample_from_values(row) for row in imu_array.tolist()]
+        gps_samples = [GPSSample(*row) for row in gps_array.tolist()]
+        calibration_samples = [_imu_sample_from_values(row) for row in cal_array.tolist()]
+
         return header, imu_samples, gps_samples, calibration_samples
     
-    def read_as_numpy(self) -> Tuple[Header, np.ndarray, np.ndarray, np.ndarray]:
-        """Read data as numpy arrays for fast processing"""
-        header, imu_list, gps_list, cal_list = self.read()
-        
-        # Convert to numpy arrays
-        imu_dtype = [
-            ('t', 'f8'), ('ax', 'f4'), ('ay', 'f4'), ('az', 'f4'),
-            ('gx', 'f4'), ('gy', 'f4'), ('gz', 'f4')
-        ]
-        
-        # Add magnetometer fields if V3
-        if header.version == 3:
-            imu_dtype.extend([('mx', 'f4'), ('my', 'f4'), ('mz', 'f4')])
-        
-        imu_array = np.array([
-            (s.timestamp, s.ax, s.ay, s.az, s.gx, s.gy, s.gz) + 
-            ((s.mx if s.mx is not None else np.nan, 
-              s.my if s.my is not None else np.nan, 
-              s.mz if s.mz is not None else np.nan) if header.version == 3 else ())
-            for s in imu_list
-        ], dtype=imu_dtype)
-        
-        gps_dtype = [
-            ('t', 'f8'), ('lat', 'f8'), ('lon', 'f8'),
-            ('speed', 'f4'), ('heading', 'f4'), ('accuracy', 'f4')
-        ]
-        gps_array = np.array([
-            (s.timestamp, s.lat, s.lon, s.speed, s.heading, s.accuracy)
-            for s in gps_list
-        ], dtype=gps_dtype)
-        
-        cal_array = np.array([
-            (s.timestamp, s.ax, s.ay, s.az, s.gx, s.gy, s.gz) +
-            ((s.mx if s.mx is not None else np.nan, 
-              s.my if s.my is not None else np.nan, 
-              s.mz if s.mz is not None else np.nan) if header.version == 3 else ())
-            for s in cal_list
-        ], dtype=imu_dtype)
-        
+    def read_header(self) -> Header:
+        """Read only the file header - no sample data is parsed.
+
+        Cheap way to inspect counts (e.g. gps_count) before committing
+        to a full parse of a large file.
+        """
+        with open(self.filepath, 'rb') as f:
+            data = f.read(self.HEADER_SIZE_V3)
+
+        return self._read_header(data, 0, self._detect_version(data))
+
+    def read_as_numpy(self, writable: bool = False) -> Tuple[Header, np.ndarray, np.ndarray, np.ndarray]:
+        """Read data as numpy arrays for fast processing.
+
+        Parses the file directly into structured-dtype views over the
+        raw bytes (zero-copy) - no intermediate dataclass instances.
+        The views are read-only since they alias the mapped file; pass
+        writable=True (or copy individual columns) for in-place ops.
+        """
+        header, imu_array, gps_array, cal_array = self._parse_once()
+        if writable:
+            return header, imu_array.copy(), gps_array.copy(), cal_array.copy()
         return header, imu_array, gps_array, cal_array
+
+    def _parse_once(self) -> Tuple[Header, np.ndarray, np.ndarray, np.ndarray]:
+        """Parse the file once and memoize the result on the reader.
+
+        read(), read_as_lists(), read_as_numpy() and read_as_dataframes()
+        all delegate here, so mixing the APIs on one reader does not
+        re-parse the file. The memmap and derived views live as long as
+        the reader does.
+        """
+        if self._parsed is not None:
+            return self._parsed
+
+        data = self._map_file()
+
+        version = self._detect_version(data)
+        header = self._read_header(data, 0, version)
+        offset = self.HEADER_SIZE_V3 if version >= 2 else self.HEADER_SIZE_V1
+
+        if version >= 2 and header.has_calibration:
+            header.calibration = self._read_calibration(data, offset)
+            offset += self.CALIBRATION_SIZE
+
+        imu_dtype = self.IMU_DTYPE_V3 if version == 3 else self.IMU_DTYPE
+        cal_count = header.calibration_count if version >= 2 else 0
+
+        # Section offsets are fully determined by the header counts, so
+        # compute them up front - the three views are independent of
+        # each other rather than chained through a running offset.
+        imu_off = offset
+        gps_off = imu_off + header.imu_count * imu_dtype.itemsize
+        cal_off = gps_off + header.gps_count * self.GPS_DTYPE.itemsize
+
+        imu_array = np.frombuffer(data, dtype=imu_dtype, count=header.imu_count, offset=imu_off)
+        gps_array = np.frombuffer(data, dtype=self.GPS_DTYPE, count=header.gps_count, offset=gps_off)
+        cal_array = np.frombuffer(data, dtype=imu_dtype, count=cal_count, offset=cal_off)
+
+        # The views alias the read-only mapping already, but mark them
+        # explicitly so accidental writes fail loudly instead of
+        # depending on the memmap mode
+        for arr in (imu_array, gps_array, cal_array):
+            arr.flags.writeable = False
+
+        self._parsed = (header, imu_array, gps_array, cal_array)
+        return self._parsed
     
+    @staticmethod
+    def _to_dataframe(arr: np.ndarray) -> pd.DataFrame:
+        """Build a DataFrame from a structured array, column by column.
+
+        Pandas ingests each column array zero-copy instead of inferring
+        dtypes from N per-row dicts.
+        """
+        return pd.DataFrame({
+            ('timestamp' if name == 't' else name): arr[name]
+            for name in arr.dtype.names
+        })
+
     def read_as_dataframes(self) -> Tuple[Header, pd.DataFrame, pd.DataFrame, pd.DataFrame]:
         """Read data as pandas DataFrames for easy analysis"""
-        header, imu_list, gps_list, cal_list = self.read()
-        
-        # Convert IMU samples to DataFrame
-        imu_df = pd.DataFrame([
-            {
-                'timestamp': s.timestamp,
-                'ax': s.ax,
-                'ay': s.ay,
-                'az': s.az,
-                'gx': s.gx,
-                'gy': s.gy,
-                'gz': s.gz,
-                **({'mx': s.mx, 'my': s.my, 'mz': s.mz} if s.mx is not None or s.my is not None or s.mz is not None else {})
-            }
-            for s in imu_list
-        ])
-        
-        # Convert GPS samples to DataFrame
-        gps_df = pd.DataFrame([
-            {
-                'timestamp': s.timestamp,
-                'lat': s.lat,
-                'lon': s.lon,
-                'speed': s.speed,
-                'heading': s.heading,
-                'accuracy': s.accuracy
-            }
-            for s in gps_list
-        ])
-        
-        # Convert calibration samples to DataFrame
-        cal_df = pd.DataFrame([
-            {
-                'timestamp': s.timestamp,
-                'ax': s.ax,
-                'ay': s.ay,
-                'az': s.az,
-                'gx': s.gx,
-                'gy': s.gy,
-                'gz': s.gz,
-                **({'mx': s.mx, 'my': s.my, 'mz': s.mz} if s.mx is not None or s.my is not None or s.mz is not None else {})
-            }
-            for s in cal_list
-        ])
-        
-        # Add time columns in seconds relative to start
+        header, imu_array, gps_array, cal_array = self.read_as_numpy()
+
+        imu_df = self._to_dataframe(imu_array)
+        gps_df = self._to_dataframe(gps_array)
+        cal_df = self._to_dataframe(cal_array)
+
+        # Add time columns in seconds relative to start. Work on the
+        # underlying ndarrays: scalar indexing and the subtraction skip
+        # pandas' per-access indexer dispatch and Series temporaries.
         if len(imu_df) > 0:
-            imu_df['time_s'] = (imu_df['timestamp'] - imu_df['timestamp'].iloc[0]) / 1000
+            ts = imu_df['timestamp'].to_numpy(copy=False)
+            imu_df['time_s'] = (ts - ts[0]) * 0.001
         if len(gps_df) > 0:
-            t0 = imu_df['timestamp'].iloc[0] if len(imu_df) > 0 else gps_df['timestamp'].iloc[0]
-            gps_df['time_s'] = (gps_df['timestamp'] - t0) / 1000
+            ts = gps_df['timestamp'].to_numpy(copy=False)
+            t0 = imu_df['timestamp'].to_numpy(copy=False)[0] if len(imu_df) > 0 else ts[0]
+            gps_df['time_s'] = (ts - t0) * 0.001
         if len(cal_df) > 0:
-            cal_df['time_s'] = (cal_df['timestamp'] - cal_df['timestamp'].iloc[0]) / 1000
+            ts = cal_df['timestamp'].to_numpy(copy=False)
+            cal_df['time_s'] = (ts - ts[0]) * 0.001
         
         return header, imu_df, gps_df, cal_df
     
     def _read_header(self, data: bytes, offset: int, version: int) -> Header:
-        # Magic string (16 bytes)
-        magic = data[offset:offset+16].rstrip(b'\x00').decode('ascii')
+        # Magic string (16 bytes) - version is already validated, so the
+        # decode is only for the human-readable Header field; 'replace'
+        # keeps corrupted padding bytes from raising
+        magic = bytes(data[offset:offset+16]).rstrip(b'\x00').decode('ascii', 'replace')
         offset += 16
         
         # Unpack header fields
-        imu_count, gps_count = struct.unpack_from('<II', data, offset)
-        offset += 8
-        
+        imu_count, gps_count = self._HDR_COUNTS.unpack_from(data, offset)
+        offset += self._HDR_COUNTS.size
+
         # V2 has calibration count
         calibration_count = 0
         has_calibration = False
         if version >= 2:
-            calibration_count, = struct.unpack_from('<I', data, offset)
-            offset += 4
-            has_calibration = struct.unpack_from('<B', data, offset)[0] == 1
-            offset += 1
-        
-        session_start, = struct.unpack_from('<d', data, offset)
-        offset += 8
-        
-        phone_orient_byte, demo_mode_byte = struct.unpack_from('<BB', data, offset)
+            calibration_count, = self._HDR_CAL_COUNT.unpack_from(data, offset)
+            offset += self._HDR_CAL_COUNT.size
+            has_calibration = self._HDR_FLAG.unpack_from(data, offset)[0] == 1
+            offset += self._HDR_FLAG.size
+
+        session_start, = self._HDR_SESSION.unpack_from(data, offset)
+        offset += self._HDR_SESSION.size
+
+        phone_orient_byte, demo_mode_byte = self._HDR_MODE.unpack_from(data, offset)
         phone_orientation = 'coxswain' if phone_orient_byte == 1 else 'rower'
         demo_mode = demo_mode_byte == 1
-        offset += 2
-        
-        catch_thresh, finish_thresh = struct.unpack_from('<ff', data, offset)
+        offset += self._HDR_MODE.size
+
+        catch_thresh, finish_thresh = self._HDR_THRESH.unpack_from(data, offset)
         
         return Header(
             magic=magic,
@@ -288,22 +371,12 @@ class WRCDataReader:
     
     def _read_calibration(self, data: bytes, offset: int) -> CalibrationData:
         """Read calibration data block (V2 only)"""
-        pitch_offset, = struct.unpack_from('<f', data, offset)
-        offset += 4
-        roll_offset, = struct.unpack_from('<f', data, offset)
-        offset += 4
-        yaw_offset, = struct.unpack_from('<f', data, offset)
-        offset += 4
-        lateral_offset, = struct.unpack_from('<f', data, offset)
-        offset += 4
-        gravity_magnitude, = struct.unpack_from('<f', data, offset)
-        offset += 4
-        samples, = struct.unpack_from('<I', data, offset)
-        offset += 4
-        variance, = struct.unpack_from('<f', data, offset)
-        offset += 4
-        timestamp, = struct.unpack_from('<d', data, offset)
-        
+        # One unpack call for the whole payload instead of eight field
+        # reads with manual offset arithmetic
+        (pitch_offset, roll_offset, yaw_offset, lateral_offset,
+         gravity_magnitude, samples, variance,
+         timestamp) = self._CAL_STRUCT.unpack_from(data, offset)
+
         return CalibrationData(
             pitch_offset=pitch_offset,
             roll_offset=roll_offset,
@@ -315,26 +388,6 @@ class WRCDataReader:
             timestamp=timestamp
         )
     
-    def _read_imu_sample(self, data: bytes, offset: int, version: int) -> IMUSample:
-        if version == 3:
-            # V3: includes magnetometer (44 bytes)
-            # Format: d (timestamp) + fffffff (ax,ay,az,gx,gy,gz) + fff (mx,my,mz)
-            t, ax, ay, az, gx, gy, gz, mx, my, mz = struct.unpack_from('<dfffffffff', data, offset)
-            # Only include magnetometer if not NaN (using math.isnan for safety)
-            import math
-            mx_val = mx if not math.isnan(mx) else None
-            my_val = my if not math.isnan(my) else None
-            mz_val = mz if not math.isnan(mz) else None
-            return IMUSample(t, ax, ay, az, gx, gy, gz, mx_val, my_val, mz_val)
-        else:
-            # V1/V2: no magnetometer (32 bytes)
-            t, ax, ay, az, gx, gy, gz = struct.unpack_from('<dffffff', data, offset)
-            return IMUSample(t, ax, ay, az, gx, gy, gz)
-    
-    def _read_gps_sample(self, data: bytes, offset: int) -> GPSSample:
-        t, lat, lon, speed, heading, accuracy = struct.unpack_from('<dddfff', data, offset)
-        return GPSSample(t, lat, lon, speed, heading, accuracy)
-
 
 def example_usage():
     """Example: Read and plot data"""
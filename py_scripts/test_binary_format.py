@@ -14,68 +14,94 @@ import os
 def create_test_data():
     """Generate synthetic test data"""
     print("Generating test data...")
-    
+
+    rng = np.random.default_rng()
+
     # 10 seconds @ 50 Hz IMU
     n_imu = 500
     t_imu = np.linspace(0, 10000, n_imu)  # ms
-    
-    # Simulate rowing motion (25 SPM = 2.4s per stroke)
+
+    # Simulate rowing motion (25 SPM = 2.4s per stroke) - all channels
+    # computed as full vectors, not scalar-at-a-time in a Python loop
     freq = 25 / 60  # Hz
-    
-    imu_samples = []
-    for i, t in enumerate(t_imu):
-        phase = 2 * np.pi * freq * t / 1000
-        
-        # Simulate stroke pattern
-        ay = np.sin(phase) * 2.0 + np.random.normal(0, 0.1)
-        ax = np.sin(phase + np.pi/4) * 0.5 + np.random.normal(0, 0.05)
-        az = 9.8 + np.random.normal(0, 0.1)
-        
-        gx = np.sin(phase) * 10 + np.random.normal(0, 1)
-        gy = np.cos(phase) * 5 + np.random.normal(0, 1)
-        gz = np.random.normal(0, 2)
-        
-        sample = IMUSample(
-            timestamp=t,
-            ax=ax, ay=ay, az=az,
-            gx=gx, gy=gy, gz=gz
-        )
-        imu_samples.append(sample)
-    
+    phase = 2 * np.pi * freq * t_imu / 1000
+
+    # Simulate stroke pattern
+    ay = np.sin(phase) * 2.0 + rng.normal(0, 0.1, n_imu)
+    ax = np.sin(phase + np.pi/4) * 0.5 + rng.normal(0, 0.05, n_imu)
+    az = 9.8 + rng.normal(0, 0.1, n_imu)
+
+    gx = np.sin(phase) * 10 + rng.normal(0, 1, n_imu)
+    gy = np.cos(phase) * 5 + rng.normal(0, 1, n_imu)
+    gz = rng.normal(0, 2, n_imu)
+
+    imu_samples = [
+        IMUSample(*row)
+        for row in np.column_stack([t_imu, ax, ay, az, gx, gy, gz])
+    ]
+
     # 10 GPS samples @ 1 Hz
     n_gps = 10
     t_gps = np.linspace(0, 10000, n_gps)
-    
-    gps_samples = []
-    for i, t in enumerate(t_gps):
-        sample = GPSSample(
-            timestamp=t,
-            lat=53.5 + i * 0.0001,  # Hamburg area
-            lon=10.0 + i * 0.0001,
-            speed=4.0 + np.random.normal(0, 0.2),
-            heading=90.0,
-            accuracy=5.0
-        )
-        gps_samples.append(sample)
-    
+    idx = np.arange(n_gps)
+
+    gps_samples = [
+        GPSSample(*row)
+        for row in np.column_stack([
+            t_gps,
+            53.5 + idx * 0.0001,  # Hamburg area
+            10.0 + idx * 0.0001,
+            4.0 + rng.normal(0, 0.2, n_gps),
+            np.full(n_gps, 90.0),
+            np.full(n_gps, 5.0)
+        ])
+    ]
+
     print(f"  Created {len(imu_samples)} IMU samples")
     print(f"  Created {len(gps_samples)} GPS samples")
-    
+
     return imu_samples, gps_samples
 
 
+def to_structured_arrays(imu_samples, gps_samples):
+    """Pack sample lists into structured arrays matching the on-disk layout"""
+    imu_arr = np.empty(len(imu_samples), dtype=WRCDataReader.IMU_DTYPE)
+    imu_arr['t'] = [s.timestamp for s in imu_samples]
+    imu_arr['ax'] = [s.ax for s in imu_samples]
+    imu_arr['ay'] = [s.ay for s in imu_samples]
+    imu_arr['az'] = [s.az for s in imu_samples]
+    imu_arr['gx'] = [s.gx for s in imu_samples]
+    imu_arr['gy'] = [s.gy for s in imu_samples]
+    imu_arr['gz'] = [s.gz for s in imu_samples]
+
+    gps_arr = np.empty(len(gps_samples), dtype=WRCDataReader.GPS_DTYPE)
+    gps_arr['t'] = [s.timestamp for s in gps_samples]
+    gps_arr['lat'] = [s.lat for s in gps_samples]
+    gps_arr['lon'] = [s.lon for s in gps_samples]
+    gps_arr['speed'] = [s.speed for s in gps_samples]
+    gps_arr['heading'] = [s.heading for s in gps_samples]
+    gps_arr['accuracy'] = [s.accuracy for s in gps_samples]
+
+    return imu_arr, gps_arr
+
+
 def write_binary_test_file(imu_samples, gps_samples, filepath):
     """Write test data using the binary format"""
     print(f"\nWriting binary file: {filepath}")
-    
+
     MAGIC = b'WRC_COACH_V1\0\0\0\0'
     HEADER_SIZE = 64
     IMU_SAMPLE_SIZE = 32
     GPS_SAMPLE_SIZE = 36
-    
+
     total_size = HEADER_SIZE + len(imu_samples) * IMU_SAMPLE_SIZE + len(gps_samples) * GPS_SAMPLE_SIZE
     print(f"  Total size: {total_size} bytes ({total_size/1024:.2f} KB)")
-    
+
+    # Dump each sample block with a single tofile() write instead of
+    # seven struct.pack calls per sample. Reusing the reader's dtypes
+    # also verifies writer and reader agree bit-for-bit.
+    imu_arr, gps_arr = to_structured_arrays(imu_samples, gps_samples)
+
     with open(filepath, 'wb') as f:
         # Write header
         f.write(MAGIC)
@@ -87,26 +113,11 @@ def write_binary_test_file(imu_samples, gps_samples, filepath):
         f.write(struct.pack('<f', 0.6))                # Catch threshold
         f.write(struct.pack('<f', -0.3))               # Finish threshold
         f.write(b'\x00' * 22)                          # Reserved
-        
-        # Write IMU samples
-        for sample in imu_samples:
-            f.write(struct.pack('<d', sample.timestamp))
-            f.write(struct.pack('<f', sample.ax))
-            f.write(struct.pack('<f', sample.ay))
-            f.write(struct.pack('<f', sample.az))
-            f.write(struct.pack('<f', sample.gx))
-            f.write(struct.pack('<f', sample.gy))
-            f.write(struct.pack('<f', sample.gz))
-        
-        # Write GPS samples
-        for sample in gps_samples:
-            f.write(struct.pack('<d', sample.timestamp))
-            f.write(struct.pack('<d', sample.lat))
-            f.write(struct.pack('<d', sample.lon))
-            f.write(struct.pack('<f', sample.speed))
-            f.write(struct.pack('<f', sample.heading))
-            f.write(struct.pack('<f', sample.accuracy))
-    
+
+        # Write IMU and GPS blocks as contiguous binary dumps
+        imu_arr.tofile(f)
+        gps_arr.tofile(f)
+
     print(f"  ✓ File written successfully")
 
 
@@ -115,30 +126,30 @@ def verify_round_trip(original_imu, original_gps, filepath):
     print(f"\nVerifying round-trip...")
     
     reader = WRCDataReader(filepath)
-    header, read_imu, read_gps = reader.read()
-    
+    header, read_imu, read_gps, read_cal = reader.read_as_numpy()
+
     # Verify counts
     assert len(read_imu) == len(original_imu), f"IMU count mismatch: {len(read_imu)} != {len(original_imu)}"
     assert len(read_gps) == len(original_gps), f"GPS count mismatch: {len(read_gps)} != {len(original_gps)}"
     print(f"  ✓ Sample counts match")
-    
+
     # Verify header
     assert header.phone_orientation == 'rower'
     assert header.demo_mode == True
     assert abs(header.catch_threshold - 0.6) < 0.01
     assert abs(header.finish_threshold - (-0.3)) < 0.01
     print(f"  ✓ Header metadata correct")
-    
-    # Verify IMU data (check first and last samples)
-    assert abs(read_imu[0].timestamp - original_imu[0].timestamp) < 0.001
-    assert abs(read_imu[0].ax - original_imu[0].ax) < 0.0001
-    assert abs(read_imu[-1].ay - original_imu[-1].ay) < 0.0001
-    print(f"  ✓ IMU data integrity verified")
-    
-    # Verify GPS data
-    assert abs(read_gps[0].lat - original_gps[0].lat) < 0.000001
-    assert abs(read_gps[-1].speed - original_gps[-1].speed) < 0.001
-    print(f"  ✓ GPS data integrity verified")
+
+    # Verify every sample, not just the endpoints: serialization is a
+    # lossless binary round-trip, so the structured arrays read back
+    # must match the written ones bit-for-bit. One vectorized
+    # comparison per block covers the whole file.
+    orig_imu_arr, orig_gps_arr = to_structured_arrays(original_imu, original_gps)
+    np.testing.assert_array_equal(np.asarray(read_imu), orig_imu_arr)
+    print(f"  ✓ IMU data integrity verified ({len(read_imu)} samples, bitwise)")
+
+    np.testing.assert_array_equal(np.asarray(read_gps), orig_gps_arr)
+    print(f"  ✓ GPS data integrity verified ({len(read_gps)} samples, bitwise)")
     
     print(f"\n  ✅ All tests passed!")
     return True
@@ -149,7 +160,7 @@ def test_numpy_reader(filepath):
     print(f"\nTesting numpy reader...")
     
     reader = WRCDataReader(filepath)
-    header, imu_array, gps_array = reader.read_as_numpy()
+    header, imu_array, gps_array, cal_array = reader.read_as_numpy()
     
     print(f"  IMU array shape: {imu_array.shape}")
     print(f"  IMU dtype: {imu_array.dtype}")
@@ -182,29 +193,28 @@ def compare_file_sizes(filepath):
     binary_size = os.path.getsize(filepath)
     print(f"  Binary (.wrcdata): {binary_size} bytes ({binary_size/1024:.2f} KB)")
     
-    # Generate equivalent CSV
-    csv_filepath = filepath.replace('.wrcdata', '.csv')
+    # Size of the equivalent CSV, computed in memory - the rows are
+    # formatted exactly as before but only their lengths are summed,
+    # so no throwaway file is written and re-deleted
     reader = WRCDataReader(filepath)
-    header, imu, gps = reader.read()
-    
-    with open(csv_filepath, 'w') as f:
-        f.write('t,type,ax,ay,az,gx,gy,gz,lat,lon,speed,heading,accuracy\n')
-        for sample in imu:
-            f.write(f'{sample.timestamp},imu,{sample.ax},{sample.ay},{sample.az},'
-                   f'{sample.gx},{sample.gy},{sample.gz},,,,,,\n')
-        for sample in gps:
-            f.write(f'{sample.timestamp},gps,,,,,,,'
-                   f'{sample.lat},{sample.lon},{sample.speed},{sample.heading},{sample.accuracy}\n')
-    
-    csv_size = os.path.getsize(csv_filepath)
+    header, imu, gps, cal = reader.read()
+
+    csv_size = len('t,type,ax,ay,az,gx,gy,gz,lat,lon,speed,heading,accuracy\n')
+    csv_size += sum(
+        len(f'{sample.timestamp},imu,{sample.ax},{sample.ay},{sample.az},'
+            f'{sample.gx},{sample.gy},{sample.gz},,,,,,\n')
+        for sample in imu
+    )
+    csv_size += sum(
+        len(f'{sample.timestamp},gps,,,,,,,'
+            f'{sample.lat},{sample.lon},{sample.speed},{sample.heading},{sample.accuracy}\n')
+        for sample in gps
+    )
     print(f"  CSV (.csv): {csv_size} bytes ({csv_size/1024:.2f} KB)")
-    
+
     compression = (1 - binary_size / csv_size) * 100
     print(f"  Compression: {compression:.1f}% smaller")
     print(f"  Ratio: {csv_size/binary_size:.2f}× larger (CSV)")
-    
-    # Clean up CSV
-    os.remove(csv_filepath)
 
 
 def main():
